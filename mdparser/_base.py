@@ -1,6 +1,7 @@
 import weakref
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from itertools import count
 from typing import Any, Callable, Optional
 
 
@@ -17,11 +18,34 @@ def make_formatter(f: Optional[str] = None) -> Callable[[Any], str]:
     return formatter
 
 
+_nvtype_bit_counter = count(1)
+
+
 class NodeValue(ABC):
-    """Abstract base class for node value types"""
+    """Abstract base class for node value types
+
+    Every node value type gets a unique bit `_nvtype_bit`.
+    The mask `_nvtype_mask` combines the bits of a type and all
+    the node value types it derives from, so that
+    `value._nvtype_mask & nvtype._nvtype_bit` is equivalent to
+    `isinstance(value, nvtype)` (virtual subclasses excluded).
+
+    Node value types with a fixed set of attributes declare `__slots__`.
+    """
+
+    __slots__ = ("_number", "__weakref__")
 
     _count = 0
     _node_key_name = "abstract"
+    _nvtype_bit = _nvtype_mask = 1
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        cls._nvtype_bit = 1 << next(_nvtype_bit_counter)
+        cls._nvtype_mask = 0
+        for base in cls.__mro__:
+            cls._nvtype_mask |= vars(base).get("_nvtype_bit", 0)
 
     @classmethod
     def reset_count(cls, value: Optional[int] = None):
@@ -35,11 +59,11 @@ class NodeValue(ABC):
 
     @property
     def count(self):
-        return self._count
+        return self._number
 
     def __init__(self):
         self.increase_count()
-        self._count = type(self)._count
+        self._number = type(self)._count
 
     @abstractmethod
     def __str__(self):
@@ -51,12 +75,14 @@ class NodeValue(ABC):
 
     def _make_node_key(self) -> str:
         """Return string usable as node key"""
-        return f"{self._node_key_name}_{self._count}"
+        return f"{self._node_key_name}_{self._number}"
 
 
 class GenericNodeValue(NodeValue):
     """Generic fallback node value"""
 
+    __slots__ = ("value",)
+
     _node_key_name = "generic"
 
     def __init__(self, value):
@@ -71,7 +97,17 @@ class GenericNodeValue(NodeValue):
 
 
 class Node:
-    __slots__ = ["_prev", "_next", "_key", "value", "__weakref__"]
+    """Element of a topology linked to its neighbours
+
+    Note:
+        A topology tracks the node value types of its linked nodes.
+        Assigning to :attr:`value` of a node that is linked into a
+        topology bypasses this tracking, so that type searches on the
+        topology can miss the node.  Use
+        :meth:`~mdparser.topology.Topology.replace` instead.
+    """
+
+    __slots__ = ["_prev", "next", "_key", "value", "__weakref__"]
 
     def __init__(
         self,
@@ -88,6 +124,12 @@ class Node:
 
     @property
     def key(self) -> Optional[str]:
+        """Node key
+
+        If not set, the key is taken from the node value.  Keys of
+        nodes linked into a topology are interned strings.
+        """
+
         if self._key is not None:
             return self._key
 
@@ -113,17 +155,8 @@ class Node:
             value = ensure_proxy(value)
         self._prev = value
 
-    @property
-    def next(self) -> Optional["Node"]:
-        return self._next
-
-    @next.setter
-    def next(self, value: Optional["Node"]) -> None:
-        self._next = value
-
     def __repr__(self) -> str:
-        attr_str = f"(key={self.key!r}, value={self.value!r})"
-        return f"{type(self).__name__}{attr_str}"
+        return f"{type(self).__name__}(key={self.key!r}, value={self.value!r})"
 
     def connect(self, other: "Node", forward: bool = True) -> None:
         """Link another node in forward/backward direction
@@ -143,9 +176,9 @@ class Node:
 
         if forward is True:
             self.next = other
-            other.prev = ensure_proxy(self)
+            other.prev = self
         else:
-            self.prev = ensure_proxy(other)
+            self.prev = other
             other.next = self
 
     def disconnect(self, forward: bool = False, backward: bool = False) -> None:
@@ -170,6 +203,32 @@ class Node:
         return self.prev is not None
 
 
+def get_nvtype_bits(nvtype) -> Optional[int]:
+    """Combine the bits of one or more node value types
+
+    Args:
+        nvtype: Node value type or tuple of node value types
+
+    Returns:
+        Combined bits or `None` if any of the types is not
+        a node value type
+    """
+
+    if isinstance(nvtype, tuple):
+        bits = 0
+        for t in nvtype:
+            t_bits = get_nvtype_bits(t)
+            if t_bits is None:
+                return None
+            bits |= t_bits
+        return bits
+
+    if isinstance(nvtype, type) and issubclass(nvtype, NodeValue):
+        return nvtype._nvtype_bit
+
+    return None
+
+
 def ensure_proxy(obj):
     """Return a proxy of an object avoiding proxy of proxy"""
 
@@ -1,4 +1,3 @@
-from itertools import count
 from typing import Any, Callable, List, Iterable, Optional, Tuple
 
 from ._base import NodeValue, make_formatter, trim_locals
@@ -7,6 +6,8 @@ from ._base import NodeValue, make_formatter, trim_locals
 class Define(NodeValue):
     """#define or #undef directives"""
 
+    __slots__ = ("key", "value")
+
     _node_key_name = "define"
 
     def __init__(self, key, value):
@@ -31,6 +32,8 @@ class Define(NodeValue):
 class Condition(NodeValue):
     """#ifdef, #ifndef, #endif directives"""
 
+    __slots__ = ("key", "value", "complement")
+
     _node_key_name = "condition"
 
     def __init__(self, key, value, complement=None):
@@ -237,6 +240,8 @@ class Comment(NodeValue):
 class Include(NodeValue):
     """#include directive"""
 
+    __slots__ = ("include",)
+
     _node_key_name = "include"
 
     def __init__(self, include: str):
@@ -250,11 +255,6 @@ class Include(NodeValue):
         return f"{type(self).__name__}({self.include})"
 
 
-class FlexibleArgs:
-    def __iter__(self):
-        yield from ((f"a{i}", str, lambda x: x) for i in count(1))
-
-
 class SectionEntry(NodeValue):
     """A section entry
 
@@ -321,11 +321,11 @@ class SectionEntry(NodeValue):
 
     @classmethod
     def from_line(cls, *args, comment=None):
-        allowed_args = cls._args
-        if not allowed_args:
-            allowed_args = FlexibleArgs()
+        if not cls._args:
+            kwargs = {f"a{i}": v for i, v in enumerate(args, 1)}
+        else:
+            kwargs = {kw[0]: v for kw, v in zip(cls._args, args)}
 
-        kwargs = {kw[0]: v for kw, v in zip(allowed_args, args)}
         return cls(comment=comment, **kwargs)
 
     def __str__(self):
@@ -361,21 +361,24 @@ class SectionEntry(NodeValue):
 
 
 class PropertyInvoker:
-    """Invokes descriptor protocol for instance attributes"""
+    """Invokes descriptor protocol for properties set as instance attributes"""
 
     def __setattr__(self, attr, value):
         try:
             got = super().__getattribute__(attr)
-            got.__set__(self, value)
         except AttributeError:
+            got = None
+
+        if isinstance(got, property):
+            got.__set__(self, value)
+        else:
             super().__setattr__(attr, value)
 
     def __getattribute__(self, attr):
         got = super().__getattribute__(attr)
-        try:
+        if isinstance(got, property):
             return got.__get__(self, type(self))
-        except AttributeError:
-            return got
+        return got
 
 
 class P1TermEntry(SectionEntry, PropertyInvoker):
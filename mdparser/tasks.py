@@ -33,6 +33,7 @@ def get_last_entry(section_node):
 
 def merge_molecules(top: topology.GromacsTopology, name=None):
     section_nvtype = topology.GromacsTopology.select_nvtype("section")
+    subsection_nvtype = topology.GromacsTopology.select_nvtype("subsection")
     moleculetype_section_nvtype = topology.GromacsTopology.select_nvtype("moleculetype")
     atoms_entry_nvtype = topology.GromacsTopology.select_nvtype("atoms_entry")
     p1term_entry_nvtype = topology.GromacsTopology.select_nvtype("p1_term_entry")
@@ -46,32 +47,37 @@ def merge_molecules(top: topology.GromacsTopology, name=None):
     molecules_nvtype = topology.GromacsTopology.select_nvtype("molecules")
     molecules_entry_nvtype = topology.GromacsTopology.select_nvtype("molecules_entry")
 
+    # Collect moleculetypes, their subsections and the (last) molecules
+    # section in a single pass
     moleculetype_section_list = []
+    moleculetype_subsection_mapping = {}
+    molecules_section = None
+    subsection_list = None
 
-    moleculetype_section = top._root
-    while True:
-        try:
-            moleculetype_section = top.get_next_node_with_nvtype(
-                start=moleculetype_section, nvtype=moleculetype_section_nvtype
-            )
-        except LookupError:
-            break
-        else:
-            moleculetype_section_list.append(moleculetype_section)
+    for node in top:
+        value = node.value
+
+        if isinstance(value, moleculetype_section_nvtype):
+            moleculetype_section_list.append(node)
+            key = node.next.value.molecule
+            subsection_list = moleculetype_subsection_mapping[key] = []
+            continue
+
+        if isinstance(value, subsection_nvtype):
+            if subsection_list is not None:
+                subsection_list.append(node)
+            continue
+
+        if isinstance(value, section_nvtype):
+            subsection_list = None
+            if isinstance(value, molecules_nvtype):
+                molecules_section = node
 
     if len(moleculetype_section_list) == 0:
         raise LookupError("no moleculetypes found")
 
-    molecules_section = top.get_next_node_with_nvtype(
-        nvtype=molecules_nvtype, forward=False
-    )
-
-    moleculetype_subsection_mapping = {}
-    for moleculetype_section in moleculetype_section_list:
-        moleculetype_entry = moleculetype_section.next
-        key = moleculetype_entry.value.molecule
-        subsection_list = get_subsections(top, moleculetype_section)
-        moleculetype_subsection_mapping[key] = subsection_list
+    if molecules_section is None:
+        raise LookupError(f"Node of type {molecules_nvtype} not found")
 
     if name is None:
         name = moleculetype_section_list[0].next.value.molecule
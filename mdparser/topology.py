@@ -2,9 +2,11 @@ import os
 import pathlib
 import shlex
 import subprocess
+import sys
 import weakref
-from collections import OrderedDict
-from itertools import islice
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
 from typing import (
     Any,
     Dict,
@@ -15,6 +17,7 @@ from typing import (
     Tuple,
     Type,
     Optional,
+    Set,
     TextIO,
     Union,
 )
@@ -26,6 +29,7 @@ from ._base import (
     ensure_proxy,
     unproxy_node,
     get_node_path,
+    get_nvtype_bits,
 )
 from . import _gmx_nodes
 
@@ -50,12 +54,29 @@ class Topology:
     """Base class for topologies
 
     Linked list of :class:`Node` instances:
+
+    The linked nodes are also kept in a list in linked order for
+    positional access, together with a mapping of node keys to positions
+    and sorted lists of positions per node value type for searches with
+    :meth:`get_next_node_with_nvtype`.  Changes to the topology only mark
+    these records from the changed index on as outdated.  They are
+    recorded again along the links when a lookup needs them.
+
+    Note:
+        The topology keeps track of the node value types of linked nodes.
+        Use :meth:`replace` rather than assigning to `Node.value` to
+        change the value of a linked node.
     """
 
     __node_value_types = DEFAULT_GENERIC_NODE_VALUE_TYPES
 
     def __init__(self):
         self._nodes = dict()
+        self._ordered = []
+        self._positions = dict()
+        self._positions_outdated = None
+        self._nvtype_positions = dict()
+        self._nvtype_positions_outdated = None
         self._hardroot = Node()
         self._root = root = weakref.proxy(self._hardroot)
         root.prev = root.next = root
@@ -68,25 +89,22 @@ class Topology:
         return getattr(self, f"_{type(self).__name__}__node_value_types")
 
     def __iter__(self) -> Iterator[Node]:
-        root = current = self._root
-        while current.next is not root:
-            current = current.next
-            yield current
+        """Iterate over a snapshot of the linked nodes
+
+        Nodes added or removed during the iteration do not affect it.
+        """
+
+        self._update_positions()
+        return iter(self._ordered[:])
 
     def __reversed__(self) -> Iterator[Node]:
-        root = current = self._root
-        while current.prev is not root:
-            current = current.prev
-            yield current
+        self._update_positions()
+        return reversed(self._ordered[:])
 
     def __len__(self) -> int:
         """Return number of linked nodes"""
 
-        length = 0
-        for length, _ in enumerate(self, 1):
-            pass
-
-        return length
+        return len(self._nodes)
 
     def __getitem__(self, query: Union[str, int, slice]) -> Union[Node, Iterator[Node]]:
         def _query_int(query: int) -> Node:
@@ -97,37 +115,215 @@ class Topology:
                     f"not {type(query).__name__!r}"
                 )
 
-            if query < 0:
-                query = (query * -1) - 1
-                iterable = reversed(self)
+            if query >= 0:
+                self._update_positions(query + 1)
             else:
-                iterable = iter(self)
+                self._update_positions()
 
-            try:
-                node = next(islice(iterable, query, query + 1))
-            except StopIteration:
-                raise IndexError("index out of range")
-            try:
-                node = unproxy_node(node)
-            except AttributeError:
-                pass
-            return node
+            return self._ordered[query]
 
         if isinstance(query, str):
             return self._nodes[query]
 
         if isinstance(query, slice):
-            return islice(self, query.start, query.stop, query.step)
+            self._update_positions()
+            return iter(self._ordered[query])
 
         if isinstance(query, Iterable):
             return (_query_int(x) for x in query)
 
         return _query_int(query)
 
+    def _find_neighbours(self, index: int) -> Tuple[Node, Node]:
+        """Return nodes between which to insert before index
+
+        An index equal to the number of nodes inserts at the end.
+        """
+
+        if index < len(self):
+            self._update_positions(index + 1)
+            next_node = self._ordered[index]
+            return next_node.prev, next_node
+
+        root = self._root
+        return root.prev, root
+
+    def _find_relative_neighbours(
+        self, node: Node, forward: bool = True
+    ) -> Tuple[Node, Node]:
+        """Return nodes between which to insert after/before a linked node"""
+
+        if self._nodes.get(node.key) != node:
+            raise ValueError(f"{node!r} is not in list")
+
+        if forward is True:
+            return node, node.next
+
+        return node.prev, node
+
+    def _known_position(self, node: Node) -> Optional[int]:
+        """Return index of a linked node if it is recorded and up to date
+
+        The root counts as the node after the last node.
+        """
+
+        outdated = self._positions_outdated
+        if node.key is None and node == self._hardroot:
+            if outdated is None:
+                return len(self._ordered)
+            return None
+
+        index = self._positions.get(node.key)
+        if index is None or (outdated is not None and index >= outdated):
+            return None
+
+        if self._ordered[index] != node:
+            return None
+
+        return index
+
+    def _position(self, node: Node) -> int:
+        """Return index of a linked node"""
+
+        index = self._known_position(node)
+        if index is None:
+            self._update_positions()
+            index = self._known_position(node)
+
+        if index is None or node.key is None:
+            raise ValueError(f"{node!r} is not in list")
+
+        return index
+
+    def _update_positions(self, stop: Optional[int] = None) -> None:
+        """Record linked nodes and their positions up to stop index
+
+        Nodes are recorded again from the first outdated index on by
+        following the links.  If `stop` is `None`, all nodes are recorded.
+        """
+
+        start = self._positions_outdated
+        if start is None or (stop is not None and stop <= start):
+            return
+
+        ordered = self._ordered
+        del ordered[start:]
+
+        root = self._root
+        if start == 0:
+            node = root.next
+        else:
+            node = ordered[-1].next
+
+        positions = self._positions
+        index = start
+        while node is not root:
+            if index == stop:
+                self._positions_outdated = index
+                return
+
+            positions[node.key] = index
+            ordered.append(node)
+            node = node.next
+            index += 1
+
+        self._positions_outdated = None
+
+    def _outdate_positions(self, index: int) -> None:
+        """Mark recorded nodes and positions from index on as outdated"""
+
+        outdated = self._positions_outdated
+        if outdated is None or index < outdated:
+            self._positions_outdated = index
+
+        self._outdate_nvtype_positions(index)
+
+    def _update_nvtype_positions(self) -> None:
+        """Record positions by type from the first outdated index on"""
+
+        start = self._nvtype_positions_outdated
+        if start is None:
+            return
+
+        self._update_positions()
+
+        nvtype_positions = self._nvtype_positions
+        for nvtype, positions in list(nvtype_positions.items()):
+            del positions[bisect_left(positions, start) :]
+            if not positions:
+                del nvtype_positions[nvtype]
+
+        for i, node in enumerate(self._ordered[start:], start):
+            nvtype = type(node.value)
+            try:
+                nvtype_positions[nvtype].append(i)
+            except KeyError:
+                nvtype_positions[nvtype] = [i]
+
+        self._nvtype_positions_outdated = None
+
+    def _outdate_nvtype_positions(self, index: int) -> None:
+        """Mark positions by type from index on as outdated"""
+
+        outdated = self._nvtype_positions_outdated
+        if outdated is None or index < outdated:
+            self._nvtype_positions_outdated = index
+
+    def _link_block(
+        self, prev: Node, next_node: Node, block_start: Node, block_end: Node
+    ) -> None:
+        """Link a block of nodes between two neighbouring linked nodes"""
+
+        index = self._known_position(next_node)
+
+        prev.connect(block_start)
+        block_end.connect(next_node)
+
+        if index is not None:
+            self._outdate_positions(index)
+
+    def _cyclic_position(self, node: Node) -> int:
+        """Return index of a linked node, counting the root as last node"""
+
+        if node.key is None and node == self._hardroot:
+            self._update_positions()
+            return len(self._ordered)
+
+        return self._position(node)
+
+    def _search_nvtype_positions(
+        self, start: int, stop: int, nvtype, exclude=(), forward: bool = True
+    ) -> Optional[int]:
+        """Find closest position of a matching node between start and stop
+
+        See :func:`search_positions` for the meaning of `start` and `stop`.
+        """
+
+        self._update_nvtype_positions()
+
+        cycle = len(self._ordered) + 1
+        found = None
+        distance = cycle
+        for value_type, positions in self._nvtype_positions.items():
+            if not nvtype_matches(value_type, nvtype, exclude):
+                continue
+
+            index = search_positions(positions, start, stop, forward=forward)
+            if index is None:
+                continue
+
+            if forward is True:
+                index_distance = (index - start) % cycle
+            else:
+                index_distance = (start - index) % cycle
+
+            if index_distance < distance:
+                found, distance = index, index_distance
+
+        return found
+
     def __contains__(self, key: str) -> bool:
-        if key in self._nodes:
-            return True
-        return False
+        return key in self._nodes
 
     @classmethod
     def select_nvtype(cls, name: str) -> Type[NodeValue]:
@@ -168,15 +364,17 @@ class Topology:
                 "No node key was provided and none could be taken from the node"
             )
 
-        if key in self._nodes:
+        key = sys.intern(key)
+        if self._nodes.setdefault(key, node) is not node:
             raise KeyError(f"node {key!r} does already exist")
 
         node.key = key
-        self._nodes[key] = node
 
     def _batch_add_nodes(
         self, nodes: Iterable[Node], keys: Optional[Iterable[str]] = None
     ) -> None:
+        nodes = list(nodes)
+
         if keys is None:
             keys = []
             for i, node in enumerate(nodes):
@@ -185,21 +383,30 @@ class Topology:
                     raise LookupError(
                         f"No node keys were provided and none could be taken from the node with index {i}"
                     )
-                keys.append(key)
+                keys.append(sys.intern(key))
         else:
-            keys = list(keys)
-
-        nodes = list(nodes)
+            keys = [sys.intern(key) for key in keys]
 
         if len(nodes) != len(keys):
             raise ValueError("Number of nodes and keys must be equal")
 
-        for key in keys:
-            if key in self._nodes:
-                raise KeyError(f"node {key!r} does already exist")
+        if len(set(keys)) != len(keys):
+            repeated = [key for key, n in Counter(keys).items() if n > 1]
+            raise KeyError(f"nodes {sorted(repeated)!r} are not unique")
 
-        for k, node in zip(keys, nodes):
-            self._nodes[k] = node
+        if not self._nodes.keys().isdisjoint(keys):
+            existing = self._nodes.keys() & keys
+            raise KeyError(f"nodes {sorted(existing)!r} do already exist")
+
+        self._nodes.update(zip(keys, nodes))
+        for node, key in zip(nodes, keys):
+            node.key = key
+
+    def _has_nvtype(self, nvtype, exclude=()) -> bool:
+        """Check if any linked node value matches a type selection"""
+
+        self._update_nvtype_positions()
+        return any(nvtype_matches(t, nvtype, exclude) for t in self._nvtype_positions)
 
     def add(self, key: str, value: NodeValue) -> None:
         root = self._root
@@ -209,30 +416,59 @@ class Topology:
         node.connect(last, forward=False)
         node.connect(root)
 
+        if self._positions_outdated is None:
+            index = len(self._ordered)
+            self._positions[node.key] = index
+            self._ordered.append(node)
+
+            if self._nvtype_positions_outdated is None:
+                self._nvtype_positions.setdefault(type(value), []).append(index)
+
     def pop(self, key: str) -> Node:
         node = self._nodes.pop(key)
+        index = self._known_position(node)
+        self._positions.pop(key, None)
+
         node.prev.next = node.next
         node.next.prev = node.prev
+
+        if index is not None:
+            self._outdate_positions(index)
+
         return node
 
     def discard(self, key: str) -> None:
         try:
-            node = self._nodes.pop(key)
+            self.pop(key)
         except KeyError:
             pass
-        else:
-            node.prev.next = node.next
-            node.next.prev = node.prev
 
     def replace(self, key: str, value: NodeValue) -> None:
         """Replace node with specific key while retaining key"""
 
         old_node = self._nodes.pop(key)
-        self._nodes[key] = new_node = Node()
-        new_node.key, new_node.value = key, value
+        index = self._known_position(old_node)
+        new_node = Node(key=key, value=value)
+        self._add_node(new_node)
         new_node.prev, new_node.next = old_node.prev, old_node.next
         new_node.prev.next = new_node
-        new_node.next.prev = weakref.proxy(new_node)
+        new_node.next.prev = new_node
+
+        if index is None:
+            return
+
+        self._ordered[index] = new_node
+
+        old_nvtype, nvtype = type(old_node.value), type(value)
+        outdated = self._nvtype_positions_outdated
+        if old_nvtype is not nvtype and (outdated is None or index < outdated):
+            positions = self._nvtype_positions[old_nvtype]
+            del positions[bisect_left(positions, index)]
+            if not positions:
+                del self._nvtype_positions[old_nvtype]
+
+            positions = self._nvtype_positions.setdefault(nvtype, [])
+            positions.insert(bisect_left(positions, index), index)
 
     def index(self, key: str, start: Optional[int] = None, stop: Optional[int] = None):
         """Return index of node
@@ -246,101 +482,75 @@ class Topology:
             ValueError if the key is not present
         """
         if start is None:
-            start = AlwaysLess()
+            start = 0
 
         if stop is None:
-            stop = AlwaysGreater()
-
-        for i, node in enumerate(self):
-            if i < start:
-                continue
-
-            if i >= stop:
-                break
+            stop = sys.maxsize
 
-            if node.key == key:
-                return i
+        node = self._nodes.get(key)
+        if node is not None:
+            index = self._position(node)
+            if start <= index < stop:
+                return index
 
         raise ValueError(f"node {key!r} is not in list")
 
     def insert(self, index: int, key: str, value: NodeValue) -> None:
-        """Insert node before index"""
+        """Insert node before index
 
-        node = Node(key=key, value=value)
-        self._add_node(node)
+        Out of range indices insert at the end.  After changes before
+        index, the nodes up to index are looked up again along the links.
+        """
 
-        prev = root = self._root
-        next_node = root.next
+        if not 0 <= index < len(self):
+            index = len(self)
 
-        for i, next_node in enumerate(self):
-            if i == index:
-                prev = next_node.prev
-                break
-        else:
-            prev = root.prev
-            next_node = prev.next
+        prev, next_node = self._find_neighbours(index)
 
-        assert prev is not None
-        prev.connect(node)
-        node.connect(next_node)
+        node = Node(key=key, value=value)
+        self._add_node(node)
+        self._link_block(prev, next_node, node, node)
 
     def relative_insert(
         self, node: Node, key: str, value: NodeValue, forward: bool = True
     ) -> None:
         """Insert node after/before other node"""
 
+        prev, next_node = self._find_relative_neighbours(node, forward=forward)
+
         new_node = Node(key=key, value=value)
         self._add_node(new_node)
-
-        if forward is True:
-            assert node.next is not None
-            new_node.connect(node.next)
-            new_node.connect(node, forward=False)
-        else:
-            assert node.prev is not None
-            node.prev.connect(new_node)
-            new_node.connect(node)
+        self._link_block(prev, next_node, new_node, new_node)
 
     def block_insert(self, index: int, block_start: Node, block_end: Node) -> None:
-        """Insert block of linked nodes before index"""
+        """Insert block of linked nodes before index
+
+        Out of range indices insert at the end.  After changes before
+        index, the nodes up to index are looked up again along the links.
+        """
 
         if not isinstance(index, int):
             raise ValueError("index must be an integer")
 
-        block_nodes = get_node_path(block_start, block_end)
-        self._batch_add_nodes(block_nodes)
+        if not 0 <= index < len(self):
+            index = len(self)
 
-        prev = root = self._root
-        next_node = root.next
+        prev, next_node = self._find_neighbours(index)
 
-        for i, next_node in enumerate(self):
-            if i == index:
-                prev = next_node.prev
-                break
-        else:
-            prev = root.prev
-            next_node = prev.next
-
-        assert prev is not None
-        prev.connect(block_start)
-        block_end.connect(next_node)
+        block_nodes = get_node_path(block_start, block_end)
+        self._batch_add_nodes(block_nodes)
+        self._link_block(prev, next_node, block_start, block_end)
 
     def relative_block_insert(
         self, node: Node, block_start: Node, block_end: Node, forward: bool = True
     ):
         """Insert block of linked nodes before/after node"""
 
+        prev, next_node = self._find_relative_neighbours(node, forward=forward)
+
         block_nodes = get_node_path(block_start, block_end)
         self._batch_add_nodes(block_nodes)
-
-        if forward is True:
-            assert node.next is not None
-            block_end.connect(node.next)
-            node.connect(block_start)
-        else:
-            assert node.prev is not None
-            node.prev.connect(block_start)
-            block_end.connect(node)
+        self._link_block(prev, next_node, block_start, block_end)
 
     def block_discard(self, block_start: Node, block_end: Node) -> None:
         if not block_start.is_backward_connected:
@@ -349,16 +559,35 @@ class Topology:
         if not block_end.is_forward_connected:
             raise ValueError("Block end is not forward connected")
 
+        nodes = self._nodes
+        for node in (block_start, block_end):
+            if nodes.get(node.key) != node:
+                raise ValueError(f"{node!r} is not in list")
+
+        root = self._root
+        block_nodes = [unproxy_node(block_start)]
+        node = block_start
+        while node != block_end:
+            node = node.next
+            if node is root:
+                raise ValueError("Could not reach end node")
+            block_nodes.append(node)
+
+        index = self._known_position(block_start)
+
+        positions = self._positions
+        for node in block_nodes:
+            del nodes[node.key]
+            positions.pop(node.key, None)
+
         prev = block_start.prev
         next_node = block_end.next
         block_start.disconnect(backward=True)
         block_end.disconnect(forward=True)
         prev.connect(next_node)  # type: ignore
 
-        block_nodes = get_node_path(block_start, block_end)
-        for node in block_nodes:
-            if node.key is not None:
-                del self._nodes[node.key]
+        if index is not None:
+            self._outdate_positions(index)
 
     def get_next_node_with_nvtype(
         self,
@@ -394,6 +623,21 @@ class Topology:
         if exclude is None:
             exclude = ()
 
+        try:
+            start_index = self._cyclic_position(start)
+            stop_index = self._cyclic_position(stop)
+        except ValueError:
+            # Nodes not linked in this topology, follow the links instead
+            pass
+        else:
+            index = self._search_nvtype_positions(
+                start_index, stop_index, nvtype, exclude, forward=forward
+            )
+            if index is None:
+                raise LookupError(f"Node of type {nvtype} not found")
+
+            return self._ordered[index]
+
         if forward is True:
             goto = "next"
         else:
@@ -402,15 +646,10 @@ class Topology:
         node = getattr(start, goto)
 
         while unproxy_node(node) is not stop:
-            if not isinstance(node.value, nvtype):
-                node = getattr(node, goto)
-                continue
+            if nvtype_matches(type(node.value), nvtype, exclude):
+                return unproxy_node(node)
 
-            if isinstance(node.value, exclude):
-                node = getattr(node, goto)
-                continue
-
-            return unproxy_node(node)
+            node = getattr(node, goto)
 
         raise LookupError(f"Node of type {nvtype} not found")
 
@@ -421,53 +660,78 @@ class GromacsTopology(Topology):
         **DEFAULT_GMX_NODE_VALUE_TYPES,
     }  # type: ignore
 
+    _include_nvtype = __node_value_types["include"]
+    _condition_nvtype = __node_value_types["condition"]
+    _subsection_nvtype = __node_value_types["subsection"]
+
     def __str__(self):
         section_type = self.select_nvtype("section")
         entry_type = self.select_nvtype("section_entry")
 
-        return_str = ""
-        for node in self:
-            if not isinstance(node.value, entry_type) and isinstance(
-                node.prev.value, entry_type
-            ):
-                return_str += "\n"
-            elif isinstance(node.value, section_type) and (node.prev is not self._root):
-                return_str += "\n"
-            return_str += f"{node.value!s}\n"
+        parts = []
+        previous_is_entry = False
+        for index, node in enumerate(self):
+            value = node.value
+            is_entry = isinstance(value, entry_type)
+            if previous_is_entry and not is_entry:
+                parts.append("\n")
+            elif index > 0 and isinstance(value, section_type):
+                parts.append("\n")
+            parts.append(f"{value!s}\n")
+            previous_is_entry = is_entry
 
-        return return_str
+        return "".join(parts)
 
     @property
     def includes_resolved(self):
-        for node in self:
-            if isinstance(node.value, self.__node_value_types["include"]):
-                return False
-        else:
-            return True
+        return not self._has_nvtype(self._include_nvtype)
 
     @property
     def conditions_resolved(self):
-        for node in self:
-            if isinstance(node.value, self.__node_value_types["condition"]):
-                return False
-        else:
-            return True
+        return not self._has_nvtype(self._condition_nvtype)
 
     def find_complement(self, node):
-        """Find complementary Condition node"""
+        """Find complementary Condition node
+
+        Nested condition blocks are skipped.  Returns `None` if no
+        complement is found or if the complement has a different key.
+        A complement recorded on the node value (e.g. by the parser)
+        is returned directly if it is still linked in the topology.
+        """
+
+        complement = getattr(node.value, "complement", None)
+        if complement is not None:
+            try:
+                linked = self._nodes.get(complement.key)
+            except ReferenceError:
+                # Complement was garbage collected
+                linked = None
+
+            if linked is not None and linked == complement:
+                return linked
 
         root = self._root
+        condition_nvtype = self._condition_nvtype
 
-        if node.value.value is None:
+        closing = node.value.value is None
+        if closing:
             goto = "prev"
         else:
             goto = "next"
 
+        depth = 0
         current = getattr(node, goto)
         while current is not root:
-            if isinstance(current.value, self.__node_value_types["condition"]):
-                if current.value.key == node.value.key:
+            value = current.value
+            if isinstance(value, condition_nvtype):
+                if (value.value is None) is closing:
+                    depth += 1
+                elif depth > 0:
+                    depth -= 1
+                elif value.key == node.value.key:
                     return current
+                else:
+                    return
             current = getattr(current, goto)
 
         return
@@ -556,7 +820,9 @@ class GromacsTopologyParser:
         file: Union[TextIO, Iterable[str]],
         local_paths: Optional[List[pathlib.Path]] = None,
         shared_paths: Optional[List[pathlib.Path]] = None,
-        include_blacklist: Optional[List[pathlib.Path]] = None,
+        include_blacklist: Optional[
+            Union[List[pathlib.Path], Mapping[int, Set[Tuple[str, ...]]]]
+        ] = None,
     ) -> Iterator[str]:
         """Pre-process topology file-like object
 
@@ -583,7 +849,10 @@ class GromacsTopologyParser:
         if include_blacklist is None:
             include_blacklist = []
 
-        for line in file:
+        if not isinstance(include_blacklist, Mapping):
+            include_blacklist = group_path_parts(include_blacklist)
+
+        for line in read_lines(file):
             if not line.startswith("#include"):
                 yield line
                 continue
@@ -660,108 +929,125 @@ class GromacsTopologyParser:
                 shared_paths=self.shared_paths,
                 include_blacklist=self.include_blacklist,
             )
+        else:
+            file = read_lines(file)
 
         active_section = None
         active_supersection = None
         active_category = 0  # 0: header, 1: moleculetype sections, 2: system sections
 
         active_conditions = OrderedDict()
+        open_condition_nodes = []  # Only used if conditions are not resolved
+        subsection_nvtype = top._subsection_nvtype
         active_definitions = {}
         active_definitions.update(self.definitions)
 
+        node_value_types = top.node_value_types
+        ignore_comments = self.ignore_comments
+        resolve_conditions = self.resolve_conditions
+
         if self.reset_counts:
-            for node_value_type in top.node_value_types.values():
+            for node_value_type in node_value_types.values():
                 node_value_type.reset_count()
 
-        previous = ""
+        previous_parts = []
         for line in file:
             if line.strip().endswith("\\"):
                 # Resolve multi-line statement
-                line = line[: line.rfind("\\")]
-                previous = f"{previous}{line}"
+                previous_parts.append(line[: line.rfind("\\")])
                 continue
 
-            line = f"{previous}{line}"
-            previous = ""
+            if previous_parts:
+                previous_parts.append(line)
+                line = "".join(previous_parts)
+                previous_parts.clear()
 
-            if self.ignore_comments:
-                line, _ = split_comment(line)
+            if ignore_comments:
+                line = line.partition(";")[0]
 
             line = line.strip()
 
             if line in ["", "\n", "\n\r"]:
                 continue
 
-            if line.startswith("#define"):
-                line = line.lstrip("#define").lstrip().split(maxsplit=1)
-                if len(line) == 1:
-                    node_key, node_value = top.make_node_value("define", line[0], True)
-                    top.add(node_key, node_value)
-                    active_definitions[line[0]] = True
-                else:
-                    node_key, node_value = top.make_node_value(
-                        "define", line[0], line[1]
-                    )
-                    top.add(node_key, node_value)
-                    active_definitions[line[0]] = line[1]
-                continue
-
-            if line.startswith("#undef"):
-                line = line.lstrip("#undef").lstrip()
-                node_key, node_value = top.make_node_value("define", line, False)
-                top.add(node_key, node_value)
-                _ = active_definitions.pop(line)
-                continue
+            if line[0] == "#":
+                if line.startswith("#define"):
+                    line = line.lstrip("#define").lstrip().split(maxsplit=1)
+                    if len(line) == 1:
+                        node_key, node_value = top.make_node_value(
+                            "define", line[0], True
+                        )
+                        top.add(node_key, node_value)
+                        active_definitions[line[0]] = True
+                    else:
+                        node_key, node_value = top.make_node_value(
+                            "define", line[0], line[1]
+                        )
+                        top.add(node_key, node_value)
+                        active_definitions[line[0]] = line[1]
+                    continue
 
-            if line.startswith("#ifdef"):
-                line = line.lstrip("#ifdef").lstrip()
-                active_conditions[line] = True
-                if not self.resolve_conditions:
-                    node_key, node_value = top.make_node_value("condition", line, True)
+                if line.startswith("#undef"):
+                    line = line.lstrip("#undef").lstrip()
+                    node_key, node_value = top.make_node_value("define", line, False)
                     top.add(node_key, node_value)
-                continue
+                    _ = active_definitions.pop(line)
+                    continue
 
-            if line.startswith("#ifndef"):
-                line = line.lstrip("#ifndef").lstrip()
-                active_conditions[line] = False
-                if not self.resolve_conditions:
-                    node_key, node_value = top.make_node_value("condition", line, False)
-                    top.add(node_key, node_value)
-                continue
+                if line.startswith("#ifdef"):
+                    line = line.lstrip("#ifdef").lstrip()
+                    active_conditions[line] = True
+                    if not resolve_conditions:
+                        node_key, node_value = top.make_node_value(
+                            "condition", line, True
+                        )
+                        top.add(node_key, node_value)
+                        open_condition_nodes.append(top[node_key])
+                    continue
 
-            if line.startswith("#else"):
-                last_condition, last_value = next(reversed(active_conditions.items()))
-                active_conditions[last_condition] = not last_value
+                if line.startswith("#ifndef"):
+                    line = line.lstrip("#ifndef").lstrip()
+                    active_conditions[line] = False
+                    if not resolve_conditions:
+                        node_key, node_value = top.make_node_value(
+                            "condition", line, False
+                        )
+                        top.add(node_key, node_value)
+                        open_condition_nodes.append(top[node_key])
+                    continue
 
-                if not self.resolve_conditions:
-                    node_key, node_value = top.make_node_value(
-                        "condition", last_condition, None
+                if line.startswith("#else"):
+                    last_condition, last_value = next(
+                        reversed(active_conditions.items())
                     )
-                    top.add(node_key, node_value)
+                    active_conditions[last_condition] = not last_value
 
-                    node_key, node_value = top.make_node_value(
-                        "condition", last_condition, not last_value
-                    )
-                    top.add(node_key, node_value)
-                    continue
+                    if not resolve_conditions:
+                        node_key, node_value = top.make_node_value(
+                            "condition", last_condition, None
+                        )
+                        top.add(node_key, node_value)
+                        link_complements(open_condition_nodes.pop(), top[node_key])
 
-            if line.startswith("#endif"):
-                last_condition, _ = active_conditions.popitem(last=True)
-                if not self.resolve_conditions:
-                    node_key, node_value = top.make_node_value(
-                        "condition", last_condition, None
-                    )
-                    top.add(node_key, node_value)
+                        node_key, node_value = top.make_node_value(
+                            "condition", last_condition, not last_value
+                        )
+                        top.add(node_key, node_value)
+                        open_condition_nodes.append(top[node_key])
+                        continue
 
-                    node = top[-1]
-                    complement = top.find_complement(node)
-                    if complement is not None:
-                        node.value.complement = ensure_proxy(complement)
-                        complement.value.complement = ensure_proxy(node)
+                if line.startswith("#endif"):
+                    last_condition, _ = active_conditions.popitem(last=True)
+                    if not resolve_conditions:
+                        node_key, node_value = top.make_node_value(
+                            "condition", last_condition, None
+                        )
+                        top.add(node_key, node_value)
+                        link_complements(open_condition_nodes.pop(), top[node_key])
 
-                continue
+                    continue
 
-            if self.resolve_conditions:
+            if resolve_conditions:
                 skip = False
                 for condition, required_value in active_conditions.items():
                     defined_value = active_definitions.get(condition, False)
@@ -789,7 +1075,7 @@ class GromacsTopologyParser:
 
             if line.startswith("["):
                 _new_section = line.strip(" []").casefold()
-                nvtype = top.node_value_types.get(_new_section, None)
+                nvtype = node_value_types.get(_new_section, None)
                 if nvtype is None:
                     # Should not happen for compliant topologies
                     if self.verbose:
@@ -805,7 +1091,7 @@ class GromacsTopologyParser:
                 else:
                     active_category = nvtype.category
 
-                issubsection = issubclass(nvtype, top.node_value_types["subsection"])
+                issubsection = issubclass(nvtype, subsection_nvtype)
 
                 if issubsection:
                     node_value = nvtype(section=weakref.proxy(active_supersection))
@@ -825,9 +1111,9 @@ class GromacsTopologyParser:
                 continue
 
             expected_entry = f"{active_section._node_key_name}_entry"
-            nvtype = top.node_value_types.get(expected_entry, False)
+            nvtype = node_value_types.get(expected_entry, False)
             if nvtype is not False:
-                if not self.ignore_comments:
+                if not ignore_comments:
                     line, comment = split_comment(line)
                 else:
                     comment = None
@@ -854,44 +1140,6 @@ class GromacsTopologyParser:
         return top
 
 
-class AlwaysGreater:
-    __slots__ = []
-
-    def __eq__(self, other):
-        return False
-
-    def __gt__(self, other):
-        return True
-
-    def __ge__(self, other):
-        return True
-
-    def __lt__(self, other):
-        return False
-
-    def __le__(self, other):
-        return False
-
-
-class AlwaysLess:
-    __slots__ = []
-
-    def __eq__(self, other):
-        return False
-
-    def __gt__(self, other):
-        return False
-
-    def __ge__(self, other):
-        return False
-
-    def __lt__(self, other):
-        return True
-
-    def __le__(self, other):
-        return True
-
-
 def get_gmx_dir():
     """Find absolute location of the gromacs shared library files
 
@@ -927,16 +1175,124 @@ def get_gmx_dir():
     return gmx_exe, gmx_shared
 
 
+def read_lines(file: Union[TextIO, Iterable[str]]) -> Iterable[str]:
+    """Read all lines of a file-like object at once
+
+    Lines are split at newline characters only, like when iterating
+    over a text file, but without keeping the line terminators.
+    Iterables of lines that are not file-like are returned as they are.
+    """
+
+    try:
+        read = file.read
+    except AttributeError:
+        return file
+
+    lines = read().split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    return lines
+
+
+def link_complements(node: Node, other: Node) -> None:
+    """Let two complementary Condition nodes refer to each other"""
+
+    node.value.complement = ensure_proxy(other)
+    other.value.complement = ensure_proxy(node)
+
+
+@lru_cache(maxsize=4096)
+def nvtype_matches(nvtype: Type, selection, exclude=()) -> bool:
+    """Check if a node value type is part of a type selection
+
+    Args:
+        nvtype: Node value type to check
+        selection: Type or tuple of types to include
+        exclude: Type or tuple of types to exclude
+
+    Compares node value type bits if possible.  The most recent
+    results are cached as there are usually only few distinct node
+    value types and selections.
+    """
+
+    want = get_nvtype_bits(selection)
+    bad = get_nvtype_bits(exclude)
+    if (want is not None) and (bad is not None):
+        mask = getattr(nvtype, "_nvtype_mask", 0)
+        return bool(mask & want) and not (mask & bad)
+
+    return issubclass(nvtype, selection) and not issubclass(nvtype, exclude)
+
+
+def search_positions(
+    positions: List[int], start: int, stop: int, forward: bool = True
+) -> Optional[int]:
+    """Find next position in a sorted list between start and stop
+
+    Positions are treated as circular, i.e. if `stop` is not
+    reached before the largest (smallest) position, the search
+    continues from the smallest (largest) position. The
+    `start` and `stop` positions are not included.
+
+    Returns:
+        Found position or `None`
+    """
+
+    if forward is True:
+        i = bisect_right(positions, start)
+        if i < len(positions) and (start >= stop or positions[i] < stop):
+            return positions[i]
+
+        if start >= stop and positions and positions[0] < stop:
+            return positions[0]
+
+        return None
+
+    i = bisect_left(positions, start) - 1
+    if i >= 0 and (stop >= start or positions[i] > stop):
+        return positions[i]
+
+    if stop >= start and positions and positions[-1] > stop:
+        return positions[-1]
+
+    return None
+
+
 def split_comment(line):
-    if ";" in line:
-        return tuple(line.split(";", maxsplit=1))
+    before, sep, after = line.partition(";")
+    if sep:
+        return before, after
     return line, None
 
 
-def path_in_paths(test_path: pathlib.Path, path_list: List[pathlib.Path]) -> bool:
-    for compare in path_list:
-        compare_parts = compare.parts
-        if test_path.parts[-len(compare_parts) :] == compare_parts:
-            return True
+def group_path_parts(
+    path_list: Iterable[pathlib.Path],
+) -> Dict[int, Set[Tuple[str, ...]]]:
+    """Map number of path components to set of path component tuples"""
+
+    grouped = defaultdict(set)
+    for path in path_list:
+        parts = path.parts
+        grouped[len(parts)].add(parts)
+
+    return dict(grouped)
+
+
+def path_in_paths(
+    test_path: pathlib.Path,
+    path_list: Union[List[pathlib.Path], Mapping[int, Set[Tuple[str, ...]]]],
+) -> bool:
+    """Check if a path ends with any of the paths in a list
+
+    Args:
+        test_path: Path to check
+        path_list: List of paths to compare against or a mapping as
+            returned by :func:`group_path_parts`.
+    """
+
+    if not isinstance(path_list, Mapping):
+        path_list = group_path_parts(path_list)
 
-    return False
+    parts = test_path.parts
+    return any(parts[-length:] in group for length, group in path_list.items())
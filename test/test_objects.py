@@ -1,5 +1,7 @@
+import io
 import pathlib
 import weakref
+from copy import copy
 
 import pytest
 
@@ -36,6 +38,13 @@ class TestNode:
         assert node.is_connected
         assert other.is_connected
 
+    def test_slots(self):
+        node = topology.Node()
+        assert not hasattr(node, "__dict__")
+
+        with pytest.raises(AttributeError):
+            node.undeclared = None
+
 
 class TestNodeValues:
     @pytest.mark.parametrize(
@@ -144,13 +153,48 @@ class TestNodeValues:
         assert nvtype._count == 2
 
         nvtype.reset_count()
-        assert node1.count == 1
-        assert node2.count == 2
+        assert node1.count == node1._number == 1
+        assert node2.count == node2._number == 2
         assert nvtype._count == 0
 
         nvtype.reset_count(3)
         assert nvtype._count == 3
 
+    def test_counting_term_entries(self):
+        nvtype = _gmx_nodes.BondsEntry
+        nvtype.reset_count()
+
+        entry = nvtype(i=1, j=2, funct=1, c=[0.1, 1000])
+        copied = copy(entry)
+        assert entry.count == 1
+        assert copied.count == 2
+        assert nvtype._count == 2
+        assert entry._make_node_key() != copied._make_node_key()
+
+        copied.c0 = 0.2
+        assert copied.c == [0.2, 1000]
+        assert entry.c0 == 0.1
+
+    @pytest.mark.parametrize(
+        "nvtype,other",
+        [
+            (_gmx_nodes.Section, _gmx_nodes.Section),
+            (_gmx_nodes.AtomsSubsection, _gmx_nodes.Section),
+            (_gmx_nodes.Section, _gmx_nodes.Subsection),
+            (_gmx_nodes.BondsEntry, _gmx_nodes.P2TermEntry),
+            (_gmx_nodes.BondsEntry, _gmx_nodes.P3TermEntry),
+            (_base.GenericNodeValue, _base.NodeValue),
+        ],
+    )
+    def test_nvtype_bits(self, nvtype, other):
+        is_subclass = bool(nvtype._nvtype_mask & _base.get_nvtype_bits(other))
+        assert is_subclass is issubclass(nvtype, other)
+
+        assert _base.get_nvtype_bits((nvtype, other)) == (
+            nvtype._nvtype_bit | other._nvtype_bit
+        )
+        assert _base.get_nvtype_bits((nvtype, str)) is None
+
     def test_entries(self):
         section_entry_type = _gmx_nodes.SectionEntry
 
@@ -158,24 +202,24 @@ class TestNodeValues:
 
         assert f"{section_entry!s}" == "a b c ; abc"
 
+    @pytest.mark.parametrize(
+        "nvtype,args",
+        [
+            (_base.GenericNodeValue, ("value",)),
+            (_gmx_nodes.Define, ("key", "value")),
+            (_gmx_nodes.Condition, ("key", True)),
+            (_gmx_nodes.Include, ("file.itp",)),
+        ],
+    )
+    def test_slots(self, nvtype, args):
+        node_value = nvtype(*args)
+        assert not hasattr(node_value, "__dict__")
+
+        with pytest.raises(AttributeError):
+            node_value.undeclared = None
 
-class TestHelper:
-    def test_always_greater(self):
-        ag = topology.AlwaysGreater()
-        assert ag > 1
-        assert ag >= 10
-        assert not (ag < 5)
-        assert not (ag <= 50)
-        assert not (ag == 0)
-
-    def test_always_less(self):
-        al = topology.AlwaysLess()
-        assert al < 1
-        assert al <= 10
-        assert not (al > 5)
-        assert not (al >= 50)
-        assert not (al == 0)
 
+class TestHelper:
     def test_ensure_proxy(self):
         node = topology.Node()
         proxy = weakref.proxy(node)
@@ -183,6 +227,22 @@ class TestHelper:
         assert isinstance(topology.ensure_proxy(proxy), weakref.ProxyType)
         assert isinstance(topology.ensure_proxy(node), weakref.ProxyType)
 
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("", []),
+            ("a\n", ["a"]),
+            ("a\n\nb", ["a", "", "b"]),
+            ("; a\x0cb\u2028c\x1e\x85\nd\n", ["; a\x0cb\u2028c\x1e\x85", "d"]),
+        ],
+    )
+    def test_read_lines(self, text, expected):
+        lines = topology.read_lines(io.StringIO(text))
+        assert lines == expected
+        assert lines == [line.rstrip("\n") for line in io.StringIO(text)]
+
+        assert topology.read_lines(expected) is expected
+
     @pytest.mark.parametrize(
         "include_path,include_blacklist,expected",
         [
@@ -216,3 +276,49 @@ class TestHelper:
     def test_path_in_blacklist(self, include_path, include_blacklist, expected):
         ignore = topology.path_in_paths(include_path, include_blacklist)
         assert ignore is expected
+
+        grouped = topology.group_path_parts(include_blacklist)
+        ignore = topology.path_in_paths(include_path, grouped)
+        assert ignore is expected
+
+    @pytest.mark.parametrize(
+        "start,stop,forward,expected",
+        [
+            (0, 10, True, 1),
+            (3, 10, True, 7),
+            (3, 7, True, None),
+            (8, 10, True, None),
+            (8, 5, True, 1),
+            (8, 1, True, None),
+            (5, 5, True, 7),
+            (10, 10, True, 1),
+            (5, 0, False, 3),
+            (1, 0, False, None),
+            (2, 5, False, 1),
+            (0, 7, False, None),
+            (0, 5, False, 7),
+            (10, 10, False, 7),
+        ],
+    )
+    def test_search_positions(self, start, stop, forward, expected):
+        found = topology.search_positions([1, 3, 7], start, stop, forward=forward)
+        assert found == expected
+
+    @pytest.mark.parametrize(
+        "nvtype,selection,exclude,expected",
+        [
+            (_gmx_nodes.AtomsSubsection, _gmx_nodes.Section, (), True),
+            (
+                _gmx_nodes.AtomsSubsection,
+                _gmx_nodes.Section,
+                _gmx_nodes.Subsection,
+                False,
+            ),
+            (_gmx_nodes.Section, _gmx_nodes.Section, _gmx_nodes.Subsection, True),
+            (_gmx_nodes.Comment, (_gmx_nodes.Section, str), (), False),
+            (str, (_gmx_nodes.Section, str), (), True),
+            (type(None), _base.NodeValue, (), False),
+        ],
+    )
+    def test_nvtype_matches(self, nvtype, selection, exclude, expected):
+        assert topology.nvtype_matches(nvtype, selection, exclude) is expected
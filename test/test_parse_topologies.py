@@ -1,3 +1,5 @@
+import io
+
 import pytest
 
 from mdparser.topology import GromacsTopology, GromacsTopologyParser
@@ -41,8 +43,20 @@ class TestParseTopologies:
 
         assert isinstance(topology, GromacsTopology)
 
-        regression_str = ""
-        for node in topology:
-            regression_str += f"{node.key:<20} {node.value!s}\n\n"
+        regression_str = "".join(
+            f"{node.key:<20} {node.value!s}\n\n" for node in topology
+        )
 
         file_regression.check(regression_str)
+
+    @pytest.mark.parametrize("preprocess", [True, False])
+    def test_parse_line_separators(self, preprocess):
+        parser = GromacsTopologyParser(
+            ignore_comments=False, preprocess=preprocess, include_shared=False
+        )
+        topology = parser.read(io.StringIO("; a\x0cb\u2028c\x85d\n#define X\n"))
+
+        assert [(node.key, f"{node.value!s}") for node in topology] == [
+            ("comment_1", "; a\x0cb\u2028c\x85d"),
+            ("define_1", "#define X"),
+        ]
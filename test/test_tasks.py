@@ -29,12 +29,28 @@ class TestTopologyTasks:
     def test_merge_molecules(self, tasks_top, file_regression):
         tasks.merge_molecules(tasks_top, name="new")
 
-        regression_string = ""
-        for node in tasks_top:
-            regression_string += f"{node.value!s}\n\n"
+        regression_string = "".join(f"{node.value!s}\n\n" for node in tasks_top)
 
         file_regression.check(regression_string)
 
+    def test_edit_after_merge_molecules(self, tasks_top):
+        tasks.merge_molecules(tasks_top, name="new")
+
+        nodes = list(tasks_top)
+        assert len(tasks_top) == len(nodes) == len(tasks_top._nodes)
+        assert [tasks_top.index(node.key) for node in nodes] == list(range(len(nodes)))
+
+        bonds_nvtype = tasks_top.select_nvtype("bonds_entry")
+        bonds_entries = [node for node in nodes if isinstance(node.value, bonds_nvtype)]
+        assert len(bonds_entries) == 2
+
+        anchor = bonds_entries[-1]
+        tasks_top.relative_insert(anchor, "inserted", bonds_nvtype(i=1, j=2, funct=1))
+        assert tasks_top.index("inserted") == tasks_top.index(anchor.key) + 1
+
+        found = tasks_top.get_next_node_with_nvtype(anchor, nvtype=bonds_nvtype)
+        assert found.key == "inserted"
+
     @pytest.mark.needs_gmx
     @pytest.mark.parametrize(
         "filename,name",
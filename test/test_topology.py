@@ -1,3 +1,5 @@
+import sys
+
 import pytest
 
 from mdparser import topology
@@ -16,6 +18,16 @@ class TestGromacsTopology:
         assert f"{top!r}" == "GromacsTopology()"
         assert f"{top!s}" == "node\n"
 
+    def test_representation_sections(self):
+        top = topology.GromacsTopology()
+        top.add("section", _gmx_nodes.Section("sec"))
+        top.add("entry", _gmx_nodes.SectionEntry(a1="a", a2="b"))
+        top.add("comment", _gmx_nodes.Comment("comment"))
+        top.add("another_section", _gmx_nodes.Section("another_sec"))
+        top.add("another_entry", _gmx_nodes.SectionEntry(a1="c"))
+
+        assert f"{top!s}" == "[ sec ]\na b\n\n; comment\n\n[ another_sec ]\nc\n"
+
     def test_node_operations(self):
         node_list = [
             ("node1", "foo"),
@@ -92,6 +104,35 @@ class TestGromacsTopology:
 
         assert top[3].value.value == "balaz"
 
+    def test_integer_indexing(self):
+        top = topology.GromacsTopology()
+        for i in range(7):
+            top.add(str(i), _base.GenericNodeValue(i))
+
+        for i in range(7):
+            assert top[i].key == str(i)
+            assert top[i - 7].key == str(i)
+
+        for i in (7, -8):
+            with pytest.raises(IndexError):
+                _ = top[i]
+
+    @pytest.mark.parametrize("index", [0, 2, 4, 5, 6, 10, -1])
+    def test_insert_positions(self, index):
+        keys = [str(i) for i in range(6)]
+        top = topology.GromacsTopology()
+        for key in keys:
+            top.add(key, _base.GenericNodeValue(key))
+
+        top.insert(index, "new", _base.GenericNodeValue("new"))
+
+        if not 0 <= index < len(keys):
+            index = len(keys)
+        keys.insert(index, "new")
+
+        assert [x.key for x in top] == keys
+        assert [x.key for x in reversed(top)] == keys[::-1]
+
     @staticmethod
     def set_up():
         top = topology.GromacsTopology()
@@ -131,6 +172,25 @@ class TestGromacsTopology:
         assert [x.value.value for x in top] == ["1", "2", "4", "5", "3"]
         assert set(top._nodes.keys()) == {"1", "2", "3", "4", "5"}
 
+    def test_block_insert_repeated_keys(self):
+        top, node, other = self.set_up()
+        other.key = node.key
+
+        with pytest.raises(KeyError):
+            top.block_insert(1, node, other)
+
+        assert [x.key for x in top] == ["1", "2", "3"]
+        assert set(top._nodes.keys()) == {"1", "2", "3"}
+
+    def test_keys_interned(self):
+        top, node, other = self.set_up()
+        node.key = "".join(["bl", "ock"])
+        top.block_insert(0, node, other)
+        top.add("".join(["ad", "ded"]), _base.GenericNodeValue("added"))
+
+        assert top[0].key is sys.intern("block")
+        assert top[-1].key is sys.intern("added")
+
     def test_block_discard(self):
         top, *_ = self.set_up()
         start = top[0]
@@ -138,6 +198,118 @@ class TestGromacsTopology:
         top.block_discard(start, end)
         assert set(top._nodes.keys()) == set()
 
+    def test_block_discard_partial(self):
+        top, node, other = self.set_up()
+        top.block_insert(1, node, other)
+
+        with pytest.raises(ValueError):
+            top.block_discard(top[3], top[1])
+
+        top.block_discard(top[1], top[3])
+        assert [x.key for x in top] == ["1", "3"]
+        assert [x.key for x in reversed(top)] == ["3", "1"]
+        assert set(top._nodes.keys()) == {"1", "3"}
+
+    def test_indexing_after_changes(self):
+        top, node, other = self.set_up()
+        top.block_insert(1, node, other)
+        top.relative_insert(top[0], "6", _base.GenericNodeValue("6"))
+        top.insert(0, "7", _base.GenericNodeValue("7"))
+        top.replace("2", _base.GenericNodeValue("8"))
+        top.discard("4")
+        top.pop("3")
+        top.block_discard(top[1], top[2])
+
+        keys = [x.key for x in top]
+        assert keys == ["7", "5", "2"]
+
+        linked_keys = []
+        node = top._root.next
+        while node is not top._root:
+            linked_keys.append(node.key)
+            node = node.next
+        assert linked_keys == keys
+
+        assert [x.key for x in top[:]] == keys
+        assert [top[i].key for i in range(-3, 3)] == keys * 2
+        assert [top.index(key) for key in keys] == [0, 1, 2]
+
+        for key in ("1", "3", "4", "6"):
+            with pytest.raises(ValueError):
+                top.index(key)
+
+    def test_indexing_after_front_changes(self):
+        top, *_ = self.set_up()
+        top.insert(0, "4", _base.GenericNodeValue("4"))
+        top.insert(0, "5", _base.GenericNodeValue("5"))
+
+        assert top[0].key == "5"
+        assert top[2].key == "1"
+        assert top.index("3") == 4
+
+        for key in ("5", "4", "1"):
+            top.discard(key)
+            assert top[0].key == top._root.next.key
+
+        assert [top.index(key) for key in ("2", "3")] == [0, 1]
+        assert [x.key for x in top] == ["2", "3"]
+
+    def test_change_during_iteration(self):
+        top, *_ = self.set_up()
+
+        visited = []
+        for node in top:
+            visited.append(node.key)
+            if node.key in top:
+                top.relative_insert(node, f"{node.key}a", _base.GenericNodeValue("a"))
+            top.discard("3")
+        assert visited == ["1", "2", "3"]
+        assert [x.key for x in top] == ["1", "1a", "2", "2a"]
+
+        visited = []
+        for node in reversed(top):
+            visited.append(node.key)
+            top.discard(node.key)
+        assert visited == ["2a", "2", "1a", "1"]
+        assert len(top) == 0
+
+    def test_search_unlinked(self):
+        top = topology.Topology()
+        top.add("a", _gmx_nodes.Define("a", None))
+
+        node = topology.Node(key="b", value=_gmx_nodes.Define("b", None))
+        other = topology.Node(key="s", value=_gmx_nodes.Section("s"))
+        node.connect(other)
+
+        found = top.get_next_node_with_nvtype(node, nvtype=_gmx_nodes.Section)
+        assert found is other
+
+    def test_search_after_changes(self):
+        top = topology.Topology()
+        for key in "abcd":
+            top.add(key, _gmx_nodes.Define(key, None))
+        top.insert(1, "s1", _gmx_nodes.Section("s1"))
+        top.insert(3, "s2", _gmx_nodes.AtomsSubsection())
+        top.replace("c", _gmx_nodes.Section("c"))
+        top.discard("b")
+
+        assert [x.key for x in top] == ["a", "s1", "s2", "c", "d"]
+
+        found = top.get_next_node_with_nvtype(nvtype=_gmx_nodes.Section)
+        assert found.key == "s1"
+        found = top.get_next_node_with_nvtype(
+            found, nvtype=_gmx_nodes.Section, exclude=_gmx_nodes.Subsection
+        )
+        assert found.key == "c"
+        found = top.get_next_node_with_nvtype(top["d"], forward=False)
+        assert found.key == "a"
+
+        top.block_discard(top["s1"], top["c"])
+        found = top.get_next_node_with_nvtype(top["a"])
+        assert found.key == "d"
+        with pytest.raises(LookupError):
+            top.get_next_node_with_nvtype(nvtype=_gmx_nodes.Section)
+
     def test_info(self):
         top = topology.GromacsTopology()
 
@@ -151,6 +323,16 @@ class TestGromacsTopology:
         assert top.includes_resolved is False
         assert top.conditions_resolved is False
 
+        top.discard("Include")
+        top.discard("check_POSRES")
+
+        assert top.includes_resolved is True
+        assert top.conditions_resolved is False
+
+        top.discard("end_POSRES")
+
+        assert top.conditions_resolved is True
+
     def test_find_complement(self):
         top = topology.GromacsTopology()
         top.add("if", _gmx_nodes.Condition("some", True))
@@ -162,6 +344,58 @@ class TestGromacsTopology:
 
         assert isinstance(complement, topology.Node)
 
+    def test_find_complement_nested(self):
+        top = topology.GromacsTopology()
+        top.add("if_outer", _gmx_nodes.Condition("some", True))
+        top.add("if_inner", _gmx_nodes.Condition("some", False))
+        top.add("end_inner", _gmx_nodes.Condition("some", None))
+        top.add("if_other", _gmx_nodes.Condition("other", True))
+        top.add("end_other", _gmx_nodes.Condition("other", None))
+        top.add("end_outer", _gmx_nodes.Condition("some", None))
+
+        assert top.find_complement(top["if_outer"]) is top["end_outer"]
+        assert top.find_complement(top["end_outer"]).key == "if_outer"
+        assert top.find_complement(top["if_inner"]) is top["end_inner"]
+        assert top.find_complement(top["end_other"]).key == "if_other"
+
+        top.discard("end_inner")
+
+        assert top.find_complement(top["if_inner"]) is top["end_outer"]
+        assert top.find_complement(top["if_outer"]) is None
+        assert top.find_complement(top["end_other"]).key == "if_other"
+
+    def test_find_complement_linked(self):
+        top = topology.GromacsTopology()
+        top.add("if", _gmx_nodes.Condition("some", True))
+        top.add("entry", _base.GenericNodeValue("important"))
+        top.add("end", _gmx_nodes.Condition("some", None))
+        topology.link_complements(top["if"], top["end"])
+
+        assert top.find_complement(top["if"]) is top["end"]
+        assert top.find_complement(top["end"]) is top["if"]
+
+        top.discard("end")
+        top.add("other_end", _gmx_nodes.Condition("some", None))
+
+        assert top.find_complement(top["if"]) is top["other_end"]
+
+    def test_get_next_node_with_nvtype_after_removal(self):
+        top = topology.GromacsTopology()
+        top.add("section", _gmx_nodes.Section("sec"))
+        top.add("entry", _gmx_nodes.SectionEntry("sec_entry"))
+
+        top.replace("section", _base.GenericNodeValue("generic"))
+        with pytest.raises(LookupError):
+            top.get_next_node_with_nvtype(nvtype=_gmx_nodes.Section)
+
+        top.add("another_section", _gmx_nodes.Section("another_sec"))
+        node = top.get_next_node_with_nvtype(nvtype=_gmx_nodes.Section)
+        assert node is top["another_section"]
+
+        top.discard("another_section")
+        with pytest.raises(LookupError):
+            top.get_next_node_with_nvtype(nvtype=_gmx_nodes.Section)
+
     def test_get_next_node_with_nvtype(self):
         top = topology.GromacsTopology()
 